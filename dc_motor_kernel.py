@@ -0,0 +1,100 @@
+"""
+Compiled integration kernel for the DC motor model.
+
+The motor state is held in a 3-element float64 array:
+- state[0]: Angular position θ (rad)
+- state[1]: Angular velocity ω (rad/s)
+- state[2]: Armature current i (A)
+
+The motor equations are linear, so with the voltage held constant over a
+step they have the exact discrete-time solution
+
+    x[k+1] = A_d x[k] + B_d v[k]
+
+where A_d and B_d come from the matrix exponential of the continuous-time
+system (zero-order hold). The kernel only applies that update; the matrices
+are built in Python by discretize().
+"""
+
+import numpy as np
+from numba import njit
+from scipy.linalg import expm
+
+
+def discretize(dt, R, L, K_b, K_m, K_f, J):
+    """
+    Compute the zero-order-hold discretisation of the motor equations.
+
+    Args:
+        dt: Step size (s)
+        R, L, K_b, K_m, K_f, J: Motor constants (see motor_parameters)
+
+    Returns:
+        Tuple of (A_d, B_d) as a 3x3 matrix and a 3-element vector
+    """
+    system = np.zeros((4, 4))
+    system[0, 1] = 1.0
+    system[1, 1] = -K_f / J
+    system[1, 2] = K_m / J
+    system[2, 1] = -K_b / L
+    system[2, 2] = -R / L
+    system[2, 3] = 1.0 / L
+
+    transition = expm(system * dt)
+    return np.ascontiguousarray(transition[:3, :3]), np.ascontiguousarray(transition[:3, 3])
+
+
+@njit(cache=True, fastmath=True)
+def advance(state, voltage, n, A_d, B_d):
+    """
+    Advance the motor state in place by n discrete steps.
+
+    Args:
+        state: Motor state array [position_rad, omega, current]
+        voltage: Applied voltage held over all steps (V)
+        n: Number of steps to take
+        A_d: Discrete state transition matrix from discretize()
+        B_d: Discrete input vector from discretize()
+    """
+    position = state[0]
+    omega = state[1]
+    current = state[2]
+
+    for _ in range(n):
+        new_position = A_d[0, 0] * position + A_d[0, 1] * omega + A_d[0, 2] * current + B_d[0] * voltage
+        new_omega = A_d[1, 0] * position + A_d[1, 1] * omega + A_d[1, 2] * current + B_d[1] * voltage
+        new_current = A_d[2, 0] * position + A_d[2, 1] * omega + A_d[2, 2] * current + B_d[2] * voltage
+
+        position = new_position
+        omega = new_omega
+        current = new_current
+
+    state[0] = position
+    state[1] = omega
+    state[2] = current
+
+
+@njit(cache=True, fastmath=True)
+def advance_batch(states, voltages, active, A_d, B_d):
+    """
+    Advance several independent motors in place by one discrete step.
+
+    Args:
+        states: Motor states, shape (3, K), rows as in advance()
+        voltages: Applied voltage per motor, shape (K,)
+        active: Boolean mask, shape (K,); inactive motors are left untouched
+        A_d: Discrete state transition matrix from discretize()
+        B_d: Discrete input vector from discretize()
+    """
+    for k in range(states.shape[1]):
+        if not active[k]:
+            continue
+
+        position = states[0, k]
+        omega = states[1, k]
+        current = states[2, k]
+        voltage = voltages[k]
+
+        states[0, k] = A_d[0, 0] * position + A_d[0, 1] * omega + A_d[0, 2] * current + B_d[0] * voltage
+        states[1, k] = A_d[1, 0] * position + A_d[1, 1] * omega + A_d[1, 2] * current + B_d[1] * voltage
+        states[2, k] = A_d[2, 0] * position + A_d[2, 1] * omega + A_d[2, 2] * current + B_d[2] * voltage
@@ -11,10 +11,18 @@ Where:
 - i: Armature current
 - ω: Angular velocity
 - θ: Angular position
+
+The equations are linear, so each step applies their exact solution for a
+voltage held constant over the step (see dc_motor_kernel).
 """
 
+import math
 import numpy as np
 from motor_parameters import J, K_f, K_m, K_b, R, L, DT
+from dc_motor_kernel import advance, advance_batch, discretize
+
+_D2R = math.pi / 180.0
+_R2D = 180.0 / math.pi
 
 class DCMotorModel:
     def __init__(self, initial_position_deg=0.0):
@@ -24,10 +32,38 @@ class DCMotorModel:
         Args:
             initial_position_deg: Initial position in degrees
         """
-        self.position_rad = np.deg2rad(initial_position_deg)
-        self.omega = 0.0  
-        self.current = 0.0  
+        self._state = np.zeros(3)
+        self.position_rad = initial_position_deg * _D2R
         self.dt = DT
+        self._cached_dt = DT
+        self._A_d, self._B_d = discretize(DT, R, L, K_b, K_m, K_f, J)
+
+    @property
+    def position_rad(self):
+        """Angular position in radians."""
+        return self._state[0]
+
+    @position_rad.setter
+    def position_rad(self, value):
+        self._state[0] = value
+
+    @property
+    def omega(self):
+        """Angular velocity in radians per second."""
+        return self._state[1]
+
+    @omega.setter
+    def omega(self, value):
+        self._state[1] = value
+
+    @property
+    def current(self):
+        """Armature current in Amperes."""
+        return self._state[2]
+
+    @current.setter
+    def current(self, value):
+        self._state[2] = value
 
     def step(self, voltage, dt=None):
         """
@@ -37,33 +73,61 @@ class DCMotorModel:
             voltage: Applied voltage to the motor (V)
             dt: Time step for this step (if None, uses self.dt)
 
+        Returns:
+            Current position in degrees
+        """
+        return self.step_batch(voltage, dt, 1)
+
+    def step_batch(self, voltage, dt=None, n=1):
+        """
+        Perform n simulation steps with a constant applied voltage.
+
+        Each step is exact for the held voltage, so a control period needs
+        no integration substeps; n > 1 advances several periods in one call.
+
+        Args:
+            voltage: Applied voltage to the motor (V)
+            dt: Time step for each step (if None, uses self.dt)
+            n: Number of steps
+
         Returns:
             Current position in degrees
         """
         if dt is None:
             dt = self.dt
 
-        
-        di_dt = (voltage - R * self.current - K_b * self.omega) / L
-        self.current += di_dt * dt
-        
-        torque = K_m * self.current
-        friction = K_f * self.omega
-        dw_dt = (torque - friction) / J
-        self.omega += dw_dt * dt
+        # The matrix exponential only depends on dt, so redo it when dt changes
+        if dt != self._cached_dt:
+            self._A_d, self._B_d = discretize(dt, R, L, K_b, K_m, K_f, J)
+            self._cached_dt = dt
+
+        advance(self._state, float(voltage), n, self._A_d, self._B_d)
 
-        
-        self.position_rad += self.omega * dt
+        return self.position_rad * _R2D
 
-        return np.rad2deg(self.position_rad)
+    def step_report(self, voltage, dt=None):
+        """
+        Perform one simulation step and report the resulting motor state.
+
+        Args:
+            voltage: Applied voltage to the motor (V)
+            dt: Time step for this step (if None, uses self.dt)
+
+        Returns:
+            Tuple of (position in degrees, velocity in degrees per second, current in Amperes)
+        """
+        self.step_batch(voltage, dt, 1)
+
+        position_rad, omega, current = self._state
+        return position_rad * _R2D, omega * _R2D, current
 
     def get_position_deg(self):
         """Get current position in degrees."""
-        return np.rad2deg(self.position_rad)
+        return self.position_rad * _R2D
 
     def get_velocity_deg_per_sec(self):
         """Get current angular velocity in degrees per second."""
-        return np.rad2deg(self.omega)
+        return self.omega * _R2D
 
     def get_current(self):
         """Get current armature current in Amperes."""
@@ -71,6 +135,59 @@ class DCMotorModel:
 
     def reset(self, position_deg=0.0):
         """Reset the motor to initial conditions."""
-        self.position_rad = np.deg2rad(position_deg)
-        self.omega = 0.0
-        self.current = 0.0
+        self._state[:] = 0.0
+        self.position_rad = position_deg * _D2R
+
+
+class DCMotorBatch:
+    """
+    K independent DC motors with identical parameters, stepped together.
+
+    State is stored as a (3, K) array with rows [position_rad, omega, current].
+    """
+
+    def __init__(self, initial_positions_deg):
+        """
+        Initialize the batch of motor models.
+
+        Args:
+            initial_positions_deg: Initial position of each motor in degrees
+        """
+        initial_positions_deg = np.asarray(initial_positions_deg, dtype=np.float64)
+        self.states = np.zeros((3, initial_positions_deg.size))
+        self.states[0] = initial_positions_deg * _D2R
+        self.dt = DT
+        self._cached_dt = DT
+        self._A_d, self._B_d = discretize(DT, R, L, K_b, K_m, K_f, J)
+
+    def step(self, voltages, active=None, dt=None):
+        """
+        Advance every active motor by one time step.
+
+        Args:
+            voltages: Applied voltage per motor (V)
+            active: Boolean mask of motors to advance (if None, all of them)
+            dt: Time step (if None, uses self.dt)
+
+        Returns:
+            Array of positions in degrees
+        """
+        if dt is None:
+            dt = self.dt
+
+        # The matrix exponential only depends on dt, so redo it when dt changes
+        if dt != self._cached_dt:
+            self._A_d, self._B_d = discretize(dt, R, L, K_b, K_m, K_f, J)
+            self._cached_dt = dt
+
+        voltages = np.asarray(voltages, dtype=np.float64)
+        if active is None:
+            active = np.ones(voltages.size, dtype=np.bool_)
+
+        advance_batch(self.states, voltages, active, self._A_d, self._B_d)
+
+        return self.get_positions_deg()
+
+    def get_positions_deg(self):
+        """Get current positions in degrees."""
+        return self.states[0] * _R2D
@@ -9,16 +9,20 @@ Simulates a realistic rotary encoder with:
 """
 
 import numpy as np
+from motor_parameters import MAX_SIMULATION_STEPS
 
 
 class RotaryEncoder:
-    def __init__(self, pulses_per_revolution=1000, noise_std=0.0):
+    def __init__(self, pulses_per_revolution=1000, noise_std=0.0,
+                 max_samples=MAX_SIMULATION_STEPS + 1, seed=None):
         """
         Initialize the rotary encoder sensor.
 
         Args:
             pulses_per_revolution: Encoder resolution (PPR)
             noise_std: Standard deviation of measurement noise in degrees
+            max_samples: Number of noise samples drawn per batch
+            seed: Seed for the noise generator (None for a random stream)
         """
         self.ppr = pulses_per_revolution
         self.noise_std = noise_std
@@ -26,6 +30,15 @@ class RotaryEncoder:
         self.count = 0
         self.previous_position_deg = 0.0
 
+        self._rng = np.random.default_rng(seed)
+        self._max_samples = max_samples
+        self._draw_noise()
+
+    def _draw_noise(self):
+        """Draw the next batch of measurement noise samples."""
+        self._noise = self._rng.standard_normal(self._max_samples) * self.noise_std
+        self._k = 0
+
     def read_position(self, actual_position_deg):
         """
         Read encoder position from actual motor position.
@@ -41,11 +54,15 @@ class RotaryEncoder:
         Returns:
             Measured position in degrees (with quantization and noise)
         """
-        counts = round(actual_position_deg / self.degrees_per_count)
+        scaled = actual_position_deg / self.degrees_per_count
+        counts = int(scaled + 0.5) if scaled >= 0 else int(scaled - 0.5)
         quantized_position = counts * self.degrees_per_count
 
         if self.noise_std > 0:
-            noise = np.random.normal(0, self.noise_std)
+            if self._k == self._max_samples:
+                self._draw_noise()
+            noise = self._noise[self._k]
+            self._k += 1
             measured_position = quantized_position + noise
         else:
             measured_position = quantized_position
@@ -55,6 +72,40 @@ class RotaryEncoder:
 
         return measured_position
 
+    def read_positions(self, actual_positions_deg):
+        """
+        Read several independent encoders of this type at once.
+
+        Applies the same quantization and noise model as read_position(),
+        without updating this encoder's count or previous reading.
+
+        Args:
+            actual_positions_deg: Array of actual motor positions in degrees
+
+        Returns:
+            Array of measured positions in degrees
+        """
+        scaled = np.asarray(actual_positions_deg, dtype=np.float64) / self.degrees_per_count
+        counts = np.trunc(scaled + np.copysign(0.5, scaled))
+        measured_positions = counts * self.degrees_per_count
+
+        if self.noise_std > 0:
+            measured_positions += self._rng.standard_normal(measured_positions.shape) * self.noise_std
+
+        return measured_positions
+
+    def noise_samples(self, n):
+        """
+        Draw n measurement noise samples from this encoder's noise stream.
+
+        Args:
+            n: Number of samples
+
+        Returns:
+            Array of noise values in degrees
+        """
+        return self._rng.standard_normal(n) * self.noise_std
+
     def get_count(self):
         """Get current encoder count."""
         return self.count
@@ -0,0 +1,107 @@
+"""
+Compiled closed-loop simulation engine.
+
+Runs the same loop as main.simulate_motor_control() - fuzzy inference, exact
+motor update and encoder quantization with noise - inside one
+Numba function, so a whole run costs a single Python call.
+
+Everything that depends on motor_parameters is passed in as an argument
+rather than read as a global, since Numba freezes globals into the cached
+machine code.
+"""
+
+import math
+
+from numba import njit
+
+from dc_motor_kernel import advance
+from fuzzy_kernel import infer
+
+
+@njit(cache=True, fastmath=True)
+def _quantize(position_deg, degrees_per_count):
+    """Round a position to the nearest encoder count, halves away from zero."""
+    scaled = position_deg / degrees_per_count
+    counts = int(scaled + 0.5) if scaled >= 0 else int(scaled - 0.5)
+    return counts * degrees_per_count
+
+
+@njit(cache=True, fastmath=True)
+def run_fuzzy(initial_position, target_position, trace, state, A_d, B_d,
+              error_mf, delta_error_mf, control_mfs, rule_table, universe, ki, integral,
+              degrees_per_count, noise, dt, voltage_scale,
+              delta_error_min, delta_error_max,
+              convergence_position, convergence_delta):
+    """
+    Run one closed-loop simulation until convergence or the end of the trace.
+
+    Args:
+        initial_position: Initial motor position in degrees
+        target_position: Desired position in degrees
+        trace: main.TRACE_DTYPE array, filled in place; its length sets the step limit
+        state: Motor state array [position_rad, omega, current], advanced in place
+        A_d, B_d: Motor discretisation for dt from dc_motor_kernel.discretize()
+        error_mf, delta_error_mf, control_mfs, rule_table, universe: Controller
+            rule base (FuzzyMotorController.kernel_args)
+        ki: Controller integral gain
+        integral: Controller integral term at the start of the run
+        degrees_per_count: Encoder resolution
+        noise: Encoder noise samples, one per trace entry
+        dt: Control period (s)
+        voltage_scale: Control signal to voltage conversion
+        delta_error_min, delta_error_max: Delta error clamp
+        convergence_position, convergence_delta: Convergence thresholds
+
+    Returns:
+        Tuple of (steps, integral) at the end of the run
+    """
+    max_steps = trace.shape[0] - 1
+    radians_to_degrees = 180.0 / math.pi
+
+    actual_position = initial_position
+    measured_position = _quantize(actual_position, degrees_per_count) + noise[0]
+    previous_error = target_position - measured_position
+
+    record = trace[0]
+    record.t = 0.0
+    record.pos = actual_position
+    record.meas = measured_position
+    record.tgt = target_position
+    record.err = previous_error
+    record.ctrl = 0.0
+    record.v = 0.0
+    record.i = 0.0
+    record.w = 0.0
+
+    step = 0
+    while step < max_steps:
+        error = target_position - measured_position
+        delta_error = min(delta_error_max, max(delta_error_min, error - previous_error))
+
+        integral = min(300.0, max(-300.0, integral + error * dt))
+        control_signal = (infer(error, delta_error, error_mf, delta_error_mf, control_mfs, rule_table, universe)
+                          + ki * integral)
+        voltage = control_signal * voltage_scale
+
+        advance(state, voltage, 1, A_d, B_d)
+        actual_position = state[0] * radians_to_degrees
+
+        step += 1
+        measured_position = _quantize(actual_position, degrees_per_count) + noise[step]
+
+        record = trace[step]
+        record.t = step * dt
+        record.pos = actual_position
+        record.meas = measured_position
+        record.tgt = target_position
+        record.err = error
+        record.ctrl = control_signal
+        record.v = voltage
+        record.i = state[2]
+        record.w = state[1] * radians_to_degrees
+        previous_error = error
+
+        if abs(error) < convergence_position and abs(delta_error) < convergence_delta:
+            break
+
+    return step, integral
@@ -4,6 +4,24 @@ from skfuzzy import control as ctrl
 from motor_parameters import (ERROR_RANGE_MIN, ERROR_RANGE_MAX,
                               DELTA_ERROR_RANGE_MIN, DELTA_ERROR_RANGE_MAX,
                               CONTROL_RANGE_MIN, CONTROL_RANGE_MAX)
+from fuzzy_kernel import infer, infer_batch
+
+ERROR_MF = {'N': [-180, -180, -30, -5], 'Z': [-8, 0, 8], 'P': [5, 30, 180, 180]}
+DELTA_ERROR_MF = {'N': [-50, -50, -6, -1], 'Z': [-2, 0, 2], 'P': [1, 6, 50, 50]}
+CONTROL_MF = {'N': [-100, -100, -35, -10], 'Z': [-15, 0, 15], 'P': [10, 35, 100, 100]}
+
+# Output term for each (error, delta_error) term pair
+RULES = {
+    ('N', 'N'): 'N', ('N', 'Z'): 'N', ('N', 'P'): 'Z',
+    ('Z', 'N'): 'Z', ('Z', 'Z'): 'Z', ('Z', 'P'): 'Z',
+    ('P', 'N'): 'Z', ('P', 'Z'): 'P', ('P', 'P'): 'P',
+}
+
+
+def _trapezoid_params(mf_table):
+    """Stack a membership table as rows of [a, b, c, d], triangles as [a, b, b, c]."""
+    return np.array([params if len(params) == 4 else [params[0], params[1], params[1], params[2]]
+                     for params in mf_table.values()], dtype=np.float64)
 
 
 class FuzzyMotorController:
@@ -14,50 +32,120 @@ class FuzzyMotorController:
     and control signal as output.
     """
 
-    def __init__(self):
+    def __init__(self, build_for_plotting=False):
+        """
+        Initialize the controller and the arrays its inference kernel uses.
+
+        Inference never goes through scikit-fuzzy, so its variables and rule
+        base are only built when plotting asks for them.
+
+        Args:
+            build_for_plotting: Build the scikit-fuzzy variables up front
+        """
         self.integral = 0.0
         self.ki = 0.1   
 
+        self.error = None
+        self.delta_error = None
+        self.control = None
+
+        self.rebuild_rule_base()
+
+        if build_for_plotting:
+            self._build_fuzzy_system()
+
+    def _build_fuzzy_system(self):
+        """Build the scikit-fuzzy variables and rule base, once."""
+        if self._control_system is not None:
+            return
+
         self.error = ctrl.Antecedent(np.arange(ERROR_RANGE_MIN, ERROR_RANGE_MAX, 1), 'error')
 
         self.delta_error = ctrl.Antecedent(np.arange(DELTA_ERROR_RANGE_MIN, DELTA_ERROR_RANGE_MAX, 1), 'delta_error')
 
         self.control = ctrl.Consequent(np.arange(CONTROL_RANGE_MIN, CONTROL_RANGE_MAX, 1), 'control')
 
-        self.error['N'] = fuzz.trapmf(self.error.universe, [-180, -180, -30, -5])
-        self.error['Z'] = fuzz.trimf(self.error.universe, [-8, 0, 8])
-        self.error['P'] = fuzz.trapmf(self.error.universe, [5, 30, 180, 180])
+        for label, params in ERROR_MF.items():
+            self.error[label] = self._make_mf(self.error.universe, params)
+        for label, params in DELTA_ERROR_MF.items():
+            self.delta_error[label] = self._make_mf(self.delta_error.universe, params)
+        for label, params in CONTROL_MF.items():
+            self.control[label] = self._make_mf(self.control.universe, params)
+
+        rules = [ctrl.Rule(self.error[e] & self.delta_error[de], self.control[out])
+                 for (e, de), out in RULES.items()]
+
+        self._control_system = ctrl.ControlSystem(rules)
 
-        self.delta_error['N'] = fuzz.trapmf(self.delta_error.universe, [-50, -50, -6, -1])
-        self.delta_error['Z'] = fuzz.trimf(self.delta_error.universe, [-2, 0, 2])
-        self.delta_error['P'] = fuzz.trapmf(self.delta_error.universe, [1, 6, 50, 50])
+    @property
+    def control_system(self):
+        """scikit-fuzzy ControlSystem equivalent to this controller's rule base."""
+        self._build_fuzzy_system()
+        return self._control_system
 
-        self.control['N'] = fuzz.trapmf(self.control.universe, [-100, -100, -35, -10])
-        self.control['Z'] = fuzz.trimf(self.control.universe, [-15, 0, 15])
-        self.control['P'] = fuzz.trapmf(self.control.universe, [10, 35, 100, 100])
+    @staticmethod
+    def _make_mf(universe, params):
+        return fuzz.trimf(universe, params) if len(params) == 3 else fuzz.trapmf(universe, params)
 
-        rule1 = ctrl.Rule(self.error['N'] & self.delta_error['N'], self.control['N'])
-        rule2 = ctrl.Rule(self.error['N'] & self.delta_error['Z'], self.control['N'])
-        rule3 = ctrl.Rule(self.error['N'] & self.delta_error['P'], self.control['Z'])
-        rule4 = ctrl.Rule(self.error['Z'] & self.delta_error['N'], self.control['Z'])
-        rule5 = ctrl.Rule(self.error['Z'] & self.delta_error['Z'], self.control['Z'])
-        rule6 = ctrl.Rule(self.error['Z'] & self.delta_error['P'], self.control['Z'])
-        rule7 = ctrl.Rule(self.error['P'] & self.delta_error['N'], self.control['Z'])
-        rule8 = ctrl.Rule(self.error['P'] & self.delta_error['Z'], self.control['P'])
-        rule9 = ctrl.Rule(self.error['P'] & self.delta_error['P'], self.control['P'])
+    def compute_control_vec(self, error_vals, delta_error_vals):
+        """
+        Evaluate the fuzzy rule base for arrays of inputs.
+
+        Runs the same compiled inference as compute_control() on every
+        broadcast pair. Inputs outside the universes are clamped to their
+        edges. The integral term is not included.
 
-        self.control_system = ctrl.ControlSystem([
-            rule1, rule2, rule3,
-            rule4, rule5, rule6,
-            rule7, rule8, rule9,
-        ])
+        Args:
+            error_vals: Array of position errors in degrees
+            delta_error_vals: Array of changes in error, broadcastable with error_vals
 
-        self.simulation = ctrl.ControlSystemSimulation(self.control_system)
+        Returns:
+            Array of fuzzy outputs with the broadcast shape of the inputs
+        """
+        error_vals = np.clip(np.asarray(error_vals, dtype=np.float64), ERROR_RANGE_MIN, ERROR_RANGE_MAX - 1)
+        delta_error_vals = np.clip(np.asarray(delta_error_vals, dtype=np.float64),
+                                   DELTA_ERROR_RANGE_MIN, DELTA_ERROR_RANGE_MAX - 1)
+        error_vals, delta_error_vals = np.broadcast_arrays(error_vals, delta_error_vals)
+
+        out = np.empty(error_vals.shape)
+        infer_batch(error_vals.ravel(), delta_error_vals.ravel(), *self.kernel_args, out.reshape(-1))
+        return out
+
+    def rebuild_rule_base(self):
+        """
+        Rebuild the arrays describing the rule base from the module tables.
+
+        Call after changing membership functions or rules; this also drops
+        the cached grid used by plot_control_surface and the scikit-fuzzy
+        variables, which are rebuilt on next use.
+        """
+        # Output sets sampled on the control universe for defuzzification
+        self._control_terms = list(CONTROL_MF)
+        self._control_universe = np.arange(CONTROL_RANGE_MIN, CONTROL_RANGE_MAX, 1).astype(float)
+        self._control_mfs = np.array([self._make_mf(self._control_universe, CONTROL_MF[label])
+                                      for label in self._control_terms])
+
+        # Plain arrays describing the rule base for the compiled kernel
+        self._error_mf = _trapezoid_params(ERROR_MF)
+        self._delta_error_mf = _trapezoid_params(DELTA_ERROR_MF)
+        self._rule_table = np.array([[self._control_terms.index(RULES[(e, de)]) for de in DELTA_ERROR_MF]
+                                     for e in ERROR_MF], dtype=np.int64)
+
+        self._control_system = None
+        self._surface_cache = None
+
+    @property
+    def kernel_args(self):
+        """Rule base arrays in the order fuzzy_kernel.infer() takes them after the two inputs."""
+        return (self._error_mf, self._delta_error_mf, self._control_mfs, self._rule_table,
+                self._control_universe)
 
     def compute_control(self, error_val, delta_error_val, dt):
         """
         Compute control signal using fuzzy inference.
 
+        The fuzzy part is evaluated exactly by the compiled inference kernel.
+
         Args:
             error_val: Position error in degrees
             delta_error_val: Change in error
@@ -66,16 +154,42 @@ class FuzzyMotorController:
             Control signal value
         """
         self.integral += error_val * dt
-        self.integral = np.clip(self.integral, -300, 300)
-
-        self.simulation.input['error'] = error_val
-        self.simulation.input['delta_error'] = delta_error_val
-        self.simulation.compute()
+        self.integral = min(300.0, max(-300.0, self.integral))
 
-        fuzzy_output = self.simulation.output['control']
+        fuzzy_output = infer(error_val, delta_error_val, *self.kernel_args)
 
         return fuzzy_output + self.ki * self.integral
 
+    def compute_control_batch(self, error_vals, delta_error_vals, integrals, dt):
+        """
+        Compute control signals for several independent loops at once.
+
+        Each loop keeps its own integral term, passed in and updated in place,
+        so this does not touch self.integral.
+
+        Args:
+            error_vals: Array of position errors in degrees
+            delta_error_vals: Array of changes in error
+            integrals: Array of integral terms, one per loop
+            dt: Time step
+
+        Returns:
+            Array of control signal values
+        """
+        integrals += error_vals * dt
+        np.clip(integrals, -300, 300, out=integrals)
+
+        fuzzy_output = np.empty(len(error_vals))
+        infer_batch(np.ascontiguousarray(error_vals, dtype=np.float64),
+                    np.ascontiguousarray(delta_error_vals, dtype=np.float64),
+                    *self.kernel_args, fuzzy_output)
+
+        return fuzzy_output + self.ki * integrals
+
+    def reset_integral(self):
+        """Clear the integral term before starting a new run."""
+        self.integral = 0.0
+
     def get_membership_functions(self):
         """
         Get membership functions for visualization.
@@ -83,4 +197,5 @@ class FuzzyMotorController:
         Returns:
             Tuple of (error, delta_error, control) membership functions
         """
+        self._build_fuzzy_system()
         return self.error, self.delta_error, self.control
@@ -0,0 +1,83 @@
+"""
+Compiled Mamdani inference kernel for the fuzzy controller.
+
+Input membership functions are passed as rows of [a, b, c, d] trapezoid
+parameters (a triangle [a, b, c] is stored as [a, b, b, c]), output sets as
+their samples on the output universe; the rule table maps (error term,
+delta error term) to an output term index.
+"""
+
+import numpy as np
+from numba import njit
+
+from membership import trap_scalar
+
+_EPS = np.finfo(np.float64).eps
+
+
+@njit(cache=True)
+def infer(error, delta_error, error_mf, delta_error_mf, control_mfs, rule_table, universe):
+    """
+    Evaluate the fuzzy rule base for one pair of inputs.
+
+    Rule firing strengths use min, output terms are aggregated with max and
+    the result is defuzzified by centroid of the piecewise-linear aggregate
+    sampled on universe, as skfuzzy does. Inputs beyond the outer shoulders
+    get the same memberships as the universe edges.
+
+    Args:
+        error: Position error in degrees
+        delta_error: Change in error
+        error_mf: Error membership parameters, shape (n_error_terms, 4)
+        delta_error_mf: Delta error membership parameters, shape (n_delta_error_terms, 4)
+        control_mfs: Output sets sampled on universe, shape (n_control_terms, universe.size)
+        rule_table: Output term index per (error term, delta error term)
+        universe: Sample points of the output universe
+
+    Returns:
+        Crisp fuzzy output
+    """
+    heights = np.zeros(control_mfs.shape[0])
+    for a in range(error_mf.shape[0]):
+        e_mu = trap_scalar(error, error_mf[a, 0], error_mf[a, 1], error_mf[a, 2], error_mf[a, 3])
+        if e_mu == 0.0:
+            continue
+        for b in range(delta_error_mf.shape[0]):
+            de_mu = trap_scalar(delta_error, delta_error_mf[b, 0], delta_error_mf[b, 1],
+                                delta_error_mf[b, 2], delta_error_mf[b, 3])
+            k = rule_table[a, b]
+            heights[k] = max(heights[k], min(e_mu, de_mu))
+
+    area = 0.0
+    moment = 0.0
+    previous = 0.0
+    for s in range(universe.size):
+        # Max of the output sets clipped at their activation heights
+        current = 0.0
+        for t in range(heights.size):
+            current = max(current, min(heights[t], control_mfs[t, s]))
+
+        if s > 0:
+            dx = universe[s] - universe[s - 1]
+            segment = 0.5 * dx * (previous + current)
+            area += segment
+            moment += universe[s - 1] * segment + dx * dx * (previous + 2.0 * current) / 6.0
+        previous = current
+
+    value = moment / max(area, _EPS)
+    return value if np.isfinite(value) else 0.0
+
+
+@njit(cache=True)
+def infer_batch(errors, delta_errors, error_mf, delta_error_mf, control_mfs, rule_table, universe, out):
+    """
+    Evaluate the fuzzy rule base for 1-D arrays of inputs.
+
+    Args:
+        errors: Position errors in degrees
+        delta_errors: Changes in error, same size as errors
+        error_mf, delta_error_mf, control_mfs, rule_table, universe: As for infer()
+        out: Output array, same size as errors, filled in place
+    """
+    for k in range(errors.size):
+        out[k] = infer(errors[k], delta_errors[k], error_mf, delta_error_mf, control_mfs, rule_table, universe)
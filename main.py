@@ -1,18 +1,28 @@
+import math
 import sys
 import numpy as np
 from fuzzy_controller import FuzzyMotorController
-from dc_motor_model import DCMotorModel
+from dc_motor_model import DCMotorModel, DCMotorBatch
 from encoder_sensor import RotaryEncoder
+from dc_motor_kernel import discretize
+from engine_numba import run_fuzzy
 from visualization import (plot_membership_functions, plot_simulation_results,
                           plot_control_surface, plot_final_summary)
 from motor_parameters import (MOTOR_RESPONSE_GAIN, MAX_SIMULATION_STEPS,
                               CONVERGENCE_THRESHOLD_POSITION, CONVERGENCE_THRESHOLD_DELTA,
                               DELTA_ERROR_MIN, DELTA_ERROR_MAX,
                               POSITION_MIN, POSITION_MAX, DISPLAY_INTERVAL,
-                              VOLTAGE_SCALE, DT, ENCODER_PPR, ENCODER_NOISE_STD)
+                              VOLTAGE_SCALE, DT, ENCODER_PPR, ENCODER_NOISE_STD,
+                              J, K_f, K_m, K_b, R, L)
 
+# Per-step simulation record: time, actual/measured/target position, error,
+# control signal, voltage, current and velocity
+TRACE_DTYPE = np.dtype([('t', 'f8'), ('pos', 'f8'), ('meas', 'f8'), ('tgt', 'f8'), ('err', 'f8'),
+                        ('ctrl', 'f8'), ('v', 'f8'), ('i', 'f8'), ('w', 'f8')])
 
-def simulate_motor_control(current_position, target_position, controller):
+
+def simulate_motor_control(current_position, target_position, controller, motor=None, encoder=None,
+                           verbose=True):
     """
     Simulate closed-loop motor control with encoder feedback.
 
@@ -20,93 +30,216 @@ def simulate_motor_control(current_position, target_position, controller):
         current_position: Initial motor position in degrees
         target_position: Desired position in degrees
         controller: FuzzyMotorController instance
+        motor: DCMotorModel to reuse, reset to current_position (if None, a new one is created)
+        encoder: RotaryEncoder to reuse, reset before the run (if None, a new one is created)
+        verbose: Print progress and the final state to the console
 
     Returns:
-        Tuple of (time_steps, actual_positions, measured_positions, targets, errors, control_signals, steps)
+        Tuple of (trace, steps), where trace is a TRACE_DTYPE array holding
+        steps + 1 records (e.g. trace['pos'] for the actual positions)
     """
-    motor = DCMotorModel(initial_position_deg=current_position)
-    encoder = RotaryEncoder(pulses_per_revolution=ENCODER_PPR, noise_std=ENCODER_NOISE_STD)
+    if motor is None:
+        motor = DCMotorModel(initial_position_deg=current_position)
+    else:
+        motor.reset(current_position)
+
+    if encoder is None:
+        encoder = RotaryEncoder(pulses_per_revolution=ENCODER_PPR, noise_std=ENCODER_NOISE_STD)
+    else:
+        encoder.reset()
 
     actual_position = current_position
     measured_position = encoder.read_position(actual_position)
     previous_error = target_position - measured_position
 
-    actual_positions = [actual_position]
-    measured_positions = [measured_position]
-    targets = [target_position]
-    errors = [previous_error]
-    control_signals = [0.0]
-    voltages = [0.0]
-    currents = [0.0]
-    velocities = [0.0]
-    time_steps = [0.0]
-
     max_steps = MAX_SIMULATION_STEPS
+    trace = np.empty(max_steps + 1, dtype=TRACE_DTYPE)
+    trace['tgt'] = target_position
+
+    # The target never changes, so per-step records go through a view without it
+    record = trace[[name for name in TRACE_DTYPE.names if name != 'tgt']]
+    record[0] = (0.0, actual_position, measured_position, previous_error, 0.0, 0.0, 0.0, 0.0)
+
     convergence_threshold = CONVERGENCE_THRESHOLD_POSITION
     step = 0
 
-    print(f"\nStarting closed-loop simulation with encoder feedback:")
-    print(f"Encoder resolution: {ENCODER_PPR} PPR ({encoder.get_resolution():.3f}°/count)")
-    print(f"Encoder noise: {ENCODER_NOISE_STD}° std dev")
-    print(f"Initial position: {current_position}°")
-    print(f"Target position: {target_position}°")
-    print(f"Initial error: {previous_error}°")
-    print(f"Time step: {DT*1000:.2f} ms\n")
+    if verbose:
+        print(f"\nStarting closed-loop simulation with encoder feedback:")
+        print(f"Encoder resolution: {ENCODER_PPR} PPR ({encoder.get_resolution():.3f}°/count)")
+        print(f"Encoder noise: {ENCODER_NOISE_STD}° std dev")
+        print(f"Initial position: {current_position}°")
+        print(f"Target position: {target_position}°")
+        print(f"Initial error: {previous_error}°")
+        print(f"Time step: {DT*1000:.2f} ms\n")
 
     while step < max_steps:
         error = target_position - measured_position
         delta_error = error - previous_error
 
-        delta_error = np.clip(delta_error, DELTA_ERROR_MIN, DELTA_ERROR_MAX)
+        delta_error = min(DELTA_ERROR_MAX, max(DELTA_ERROR_MIN, delta_error))
 
         control_signal = controller.compute_control(error, delta_error, DT)
         voltage = control_signal * VOLTAGE_SCALE
 
-        substeps = 10
-        substep_dt = DT / substeps
-        for _ in range(substeps):
-            motor.step(voltage, dt=substep_dt)
-
-        actual_position = motor.get_position_deg()
-        velocity = motor.get_velocity_deg_per_sec()
-        current = motor.get_current()
+        actual_position, velocity, current = motor.step_report(voltage)
 
         measured_position = encoder.read_position(actual_position)
 
         step += 1
-        time_steps.append(step * DT)
-        actual_positions.append(actual_position)
-        measured_positions.append(measured_position)
-        targets.append(target_position)
-        errors.append(error)
-        control_signals.append(control_signal)
-        voltages.append(voltage)
-        currents.append(current)
-        velocities.append(velocity)
+        record[step] = (step * DT, actual_position, measured_position, error,
+                        control_signal, voltage, current, velocity)
         previous_error = error
 
-        if step % DISPLAY_INTERVAL == 0:
+        if verbose and step % DISPLAY_INTERVAL == 0:
             print(f"Step {step} ({step*DT:.3f}s): Actual={actual_position:.2f}°, "
                   f"Measured={measured_position:.2f}°, Err={error:.2f}°, "
                   f"V={voltage:.2f}V, Count={encoder.get_count()}")
 
         if abs(error) < convergence_threshold and abs(delta_error) < CONVERGENCE_THRESHOLD_DELTA:
-            print(f"\nConverged at step {step} ({step*DT:.3f}s)!")
-            print(f"Final actual position: {actual_position:.2f}°")
-            print(f"Final measured position: {measured_position:.2f}°")
-            print(f"Final error: {error:.2f}°")
-            print(f"Final velocity: {velocity:.2f}°/s")
-            print(f"Final current: {current:.4f} A")
-            print(f"Final encoder count: {encoder.get_count()}")
+            if verbose:
+                print(f"\nConverged at step {step} ({step*DT:.3f}s)!")
+                print(f"Final actual position: {actual_position:.2f}°")
+                print(f"Final measured position: {measured_position:.2f}°")
+                print(f"Final error: {error:.2f}°")
+                print(f"Final velocity: {velocity:.2f}°/s")
+                print(f"Final current: {current:.4f} A")
+                print(f"Final encoder count: {encoder.get_count()}")
             break
 
-    if step >= max_steps:
+    if verbose and step >= max_steps:
         print(f"\nReached maximum steps ({max_steps})")
         print(f"Final actual position: {actual_position:.2f}°")
         print(f"Final measured position: {measured_position:.2f}°")
-        print(f"Final error: {errors[-1]:.2f}°")
+        print(f"Final error: {trace['err'][step]:.2f}°")
+
+    return trace[:step + 1], step
 
-    return time_steps, actual_positions, measured_positions, targets, errors, control_signals, step
+
+# Motor discretisation for DT, shared by every simulate_motor_control_numba() run
+_MOTOR_DISCRETIZATION = discretize(DT, R, L, K_b, K_m, K_f, J)
+
+
+def simulate_motor_control_numba(current_position, target_position, controller, encoder=None):
+    """
+    Simulate closed-loop motor control with the compiled engine.
+
+    Follows simulate_motor_control() step for step, but the whole loop runs
+    in engine_numba.run_fuzzy(); this function only prepares its inputs.
+    Nothing is printed.
+
+    Args:
+        current_position: Initial motor position in degrees
+        target_position: Desired position in degrees
+        controller: FuzzyMotorController instance (rule base, gain and integral are used)
+        encoder: RotaryEncoder supplying resolution and noise (if None, a new one is created)
+
+    Returns:
+        Tuple of (trace, steps) as returned by simulate_motor_control()
+    """
+    if encoder is None:
+        encoder = RotaryEncoder(pulses_per_revolution=ENCODER_PPR, noise_std=ENCODER_NOISE_STD)
+
+    max_steps = MAX_SIMULATION_STEPS
+    trace = np.empty(max_steps + 1, dtype=TRACE_DTYPE)
+    state = np.array([math.radians(current_position), 0.0, 0.0])
+    A_d, B_d = _MOTOR_DISCRETIZATION
+
+    step, controller.integral = run_fuzzy(
+        float(current_position), float(target_position), trace, state, A_d, B_d,
+        *controller.kernel_args, controller.ki, float(controller.integral),
+        encoder.get_resolution(), encoder.noise_samples(max_steps + 1), DT, VOLTAGE_SCALE,
+        float(DELTA_ERROR_MIN), float(DELTA_ERROR_MAX),
+        CONVERGENCE_THRESHOLD_POSITION, CONVERGENCE_THRESHOLD_DELTA,
+    )
+
+    return trace[:step + 1], step
+
+
+def simulate_many(pairs, controller, verbose=False):
+    """
+    Run simulate_motor_control() for several scenarios, reusing one set of models.
+
+    The motor, encoder and controller are built once and reset between
+    scenarios, so per-run cost excludes their construction.
+
+    Args:
+        pairs: Iterable of (current_position, target_position) in degrees
+        controller: FuzzyMotorController instance
+        verbose: Print each run's progress (off by default for sweeps)
+
+    Returns:
+        List of simulate_motor_control() results, one per pair
+    """
+    motor = DCMotorModel()
+    encoder = RotaryEncoder(pulses_per_revolution=ENCODER_PPR, noise_std=ENCODER_NOISE_STD)
+
+    results = []
+    for current_position, target_position in pairs:
+        controller.reset_integral()
+        results.append(simulate_motor_control(current_position, target_position, controller,
+                                              motor=motor, encoder=encoder, verbose=verbose))
+
+    return results
+
+
+def simulate_batch(current_positions, target_positions, controller):
+    """
+    Simulate several independent closed-loop scenarios in lockstep.
+
+    Every scenario uses the same physics, encoder model and fuzzy inference
+    as simulate_motor_control(), but all of them advance together
+    with one Python iteration per time step. A scenario stops moving once
+    it converges; the loop ends when all have converged or at the step limit.
+
+    Args:
+        current_positions: Array of initial motor positions in degrees
+        target_positions: Array of desired positions in degrees
+        controller: FuzzyMotorController instance (its rule base is shared)
+
+    Returns:
+        Tuple of (time_steps, actual_positions, steps), where actual_positions
+        has shape (len(time_steps), K) and steps holds each scenario's step count
+    """
+    current_positions = np.asarray(current_positions, dtype=np.float64)
+    target_positions = np.asarray(target_positions, dtype=np.float64)
+    n_scenarios = current_positions.size
+
+    motors = DCMotorBatch(current_positions)
+    encoder = RotaryEncoder(pulses_per_revolution=ENCODER_PPR, noise_std=ENCODER_NOISE_STD)
+
+    measured_positions = encoder.read_positions(current_positions)
+    previous_errors = target_positions - measured_positions
+    integrals = np.zeros(n_scenarios)
+
+    max_steps = MAX_SIMULATION_STEPS
+    actual_positions = np.empty((max_steps + 1, n_scenarios))
+    actual_positions[0] = current_positions
+    time_steps = np.arange(max_steps + 1) * DT
+
+    steps = np.full(n_scenarios, max_steps)
+    active = np.ones(n_scenarios, dtype=np.bool_)
+    step = 0
+
+    while step < max_steps and active.any():
+        errors = target_positions - measured_positions
+        delta_errors = np.clip(errors - previous_errors, DELTA_ERROR_MIN, DELTA_ERROR_MAX)
+
+        control_signals = controller.compute_control_batch(errors, delta_errors, integrals, DT)
+        voltages = control_signals * VOLTAGE_SCALE
+
+        positions = motors.step(voltages, active)
+        measured_positions = encoder.read_positions(positions)
+
+        step += 1
+        actual_positions[step] = positions
+        previous_errors = errors
+
+        converged = (active & (np.abs(errors) < CONVERGENCE_THRESHOLD_POSITION)
+                     & (np.abs(delta_errors) < CONVERGENCE_THRESHOLD_DELTA))
+        steps[converged] = step
+        active &= ~converged
+
+    return time_steps[:step + 1], actual_positions[:step + 1], steps
 
 
 def main():
@@ -134,7 +267,7 @@ def main():
     print("with Realistic Motor Physics Model")
     print("=" * 60)
 
-    controller = FuzzyMotorController()
+    controller = FuzzyMotorController(build_for_plotting=True)
 
     print("\nDisplaying membership functions...")
     plot_membership_functions(controller)
@@ -142,15 +275,13 @@ def main():
     print("\nDisplaying control surface...")
     plot_control_surface(controller)
 
-    time_steps, actual_positions, measured_positions, targets, errors, control_signals, steps = simulate_motor_control(
-        current_position, target_position, controller
-    )
+    trace, steps = simulate_motor_control(current_position, target_position, controller)
 
     print("\nDisplaying simulation results...")
-    plot_simulation_results(time_steps, actual_positions, targets, errors, control_signals, measured_positions)
+    plot_simulation_results(trace['t'], trace['pos'], trace['tgt'], trace['err'], trace['ctrl'], trace['meas'])
 
     print("\nDisplaying final summary...")
-    plot_final_summary(current_position, target_position, actual_positions[-1], steps)
+    plot_final_summary(current_position, target_position, trace['pos'][-1], steps)
 
     print("\n" + "=" * 60)
     print("Simulation completed successfully!")
@@ -0,0 +1,16 @@
+"""
+Membership functions for the fuzzy controller.
+
+trap_scalar() evaluates a trapezoid (or a triangle stored as [a, b, b, c])
+at a single value, for use inside Numba kernels.
+"""
+
+from numba import njit
+
+
+@njit(cache=True)
+def trap_scalar(x, a, b, c, d):
+    """Trapezoidal membership of scalar x; a == b or c == d gives a shoulder."""
+    rising = (x - a) / (b - a) if b > a else 1.0
+    falling = (d - x) / (d - c) if d > c else 1.0
+    return min(max(min(rising, falling), 0.0), 1.0)
@@ -1,115 +1,350 @@
-import matplotlib
-matplotlib.use('TkAgg')
-
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
+from matplotlib.ticker import MaxNLocator
 from mpl_toolkits.mplot3d import Axes3D
-from skfuzzy import control as ctrl
 
-def plot_membership_functions(controller):
+def _show_or_save(fig, save_path, dpi):
+    """Show fig, or write it to save_path and close it without entering the GUI event loop."""
+    if save_path is None:
+        plt.show()
+    else:
+        fig.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+
+
+def plot_membership_functions(controller, save_path=None, dpi=100):
     """
     Plot membership functions for error, delta error, and control signal.
 
     Args:
         controller: FuzzyMotorController instance
+        save_path: Write the figure to this file and close it instead of
+            showing it, so the call does not block
+        dpi: Resolution used with save_path
     """
     error, delta_error, control = controller.get_membership_functions()
 
-    error.view()
-    plt.title('Error Membership Functions')
-    plt.show()
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4), constrained_layout=True)
+    titles = ['Error Membership Functions', 'Delta Error Membership Functions',
+              'Control Signal Membership Functions']
+
+    for ax, var, title in zip(axes, [error, delta_error, control], titles):
+        for term in var.terms.values():
+            ax.plot(var.universe, term.mf, linewidth=1.5, label=term.label)
+        ax.set_xlabel(var.label)
+        ax.set_ylabel('Membership')
+        ax.set_ylim(-0.01, 1.01)
+        ax.set_title(title)
+        ax.legend()
 
-    delta_error.view()
-    plt.title('Delta Error Membership Functions')
-    plt.show()
+    _show_or_save(fig, save_path, dpi)
+
+
+def _downsample(ax, t, y):
+    """
+    Reduce a long time series to its min/max envelope per pixel column of ax.
 
-    control.view()
-    plt.title('Control Signal Membership Functions')
-    plt.show()
+    Series shorter than four points per column are returned unchanged.
 
+    Args:
+        ax: Axes the series will be drawn on
+        t: Monotonic time values
+        y: Series values
 
-def plot_simulation_results(time_steps, actual_positions, targets, errors, control_signals, measured_positions=None):
+    Returns:
+        Tuple of (t, y) to plot
+    """
+    t = np.asarray(t)
+    y = np.asarray(y)
+    n_cols = int(ax.bbox.width) or 1200
+    n = len(t)
+    if n <= 4 * n_cols:
+        return t, y
+
+    bucket = np.arange(n) * n_cols // n
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+
+    t_out = np.empty(2 * len(starts), dtype=t.dtype)
+    y_out = np.empty(2 * len(starts), dtype=y.dtype)
+    t_out[0::2] = t[starts]
+    t_out[1::2] = t[ends]
+    y_out[0::2] = np.minimum.reduceat(y, starts)
+    y_out[1::2] = np.maximum.reduceat(y, starts)
+    return t_out, y_out
+
+
+# Position subplot series as (label, color, linewidth, linestyle), drawn as one LineCollection
+_POSITION_STYLES = {
+    'actual': ('Actual Position', 'b', 2, '-'),
+    'measured': ('Encoder Reading', to_rgba('c', 0.7), 1.5, '--'),
+    'target': ('Target Position', 'r', 2, '--'),
+}
+
+
+class SimulationPlot:
+    """
+    Persistent 2x2 figure for simulation results.
+
+    Titles, labels, grids and the empty data artists are set up once in the
+    constructor; update() only replaces the data.
+    """
+
+    def __init__(self):
+        """Build the figure, its axes and empty data artists."""
+        self.fig, self.axes = plt.subplots(2, 2, figsize=(12, 10), constrained_layout=True)
+        axes = self.axes
+
+        # Series name -> Line2D, or the LineCollection holding all position series
+        self.lines = {}
+        self._legend_names = None
+        self._backgrounds = None
+
+        self.lines['position'] = LineCollection([])
+        axes[0, 0].add_collection(self.lines['position'])
+        axes[0, 0].set_xlabel('Time (s)')
+        axes[0, 0].set_ylabel('Position (degrees)')
+        axes[0, 0].set_title('Motor Position vs Target (Closed-Loop with Encoder Feedback)')
+        axes[0, 0].grid(True)
+
+        self.lines['error'], = axes[0, 1].plot([], [], 'g-', linewidth=2)
+        axes[0, 1].set_xlabel('Time (s)')
+        axes[0, 1].set_ylabel('Error (degrees)')
+        axes[0, 1].set_title('Position Error Over Time')
+        axes[0, 1].grid(True)
+
+        self.lines['control'], = axes[1, 0].plot([], [], 'm-', linewidth=2)
+        axes[1, 0].set_xlabel('Time (s)')
+        axes[1, 0].set_ylabel('Control Signal')
+        axes[1, 0].set_title('Control Signal Over Time (Fuzzy Output)')
+        axes[1, 0].grid(True)
+
+        self.lines['phase'], = axes[1, 1].plot([], [], 'c-', linewidth=1.5)
+        axes[1, 1].set_xlabel('Error (degrees)')
+        axes[1, 1].set_ylabel('Control Signal')
+        axes[1, 1].set_title('Control Signal vs Error')
+        axes[1, 1].grid(True)
+
+        self._canvas = self.fig.canvas
+        if self._canvas.supports_blit:
+            self._canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def is_open(self):
+        """Whether the figure window still exists."""
+        return plt.fignum_exists(self.fig.number)
+
+    def _on_draw(self, event):
+        """Cache the background of each subplot after a full redraw, for blitting."""
+        # savefig() draws through a temporary print canvas (PDF, SVG, ...) that
+        # cannot be blitted; only redraws of the window canvas are cached
+        if event.canvas is not self._canvas or not event.canvas.supports_blit:
+            return
+
+        # Full redraws leave out animated artists, so draw them over the saved background
+        self._backgrounds = [event.canvas.copy_from_bbox(ax.bbox) for ax in self.axes.flat]
+        for artist in self.lines.values():
+            if artist.get_animated():
+                artist.axes.draw_artist(artist)
+
+    def _blit(self):
+        """
+        Redraw only the data artists over the cached backgrounds.
+
+        The first live update fits every axis to its data. After that the
+        limits only grow: an axis whose data leaves the view is widened to the
+        union of its current view and the fitted one, so repeated runs of a
+        similar scenario keep the same background. A full redraw happens on
+        the first live update or whenever a view grows.
+        """
+        canvas = self.fig.canvas
+        full = self._backgrounds is None
+        first = False
+        for artist in self.lines.values():
+            if not artist.get_animated():
+                artist.set_animated(True)
+                first = True
+
+        for ax in self.axes.flat:
+            data, view = ax.dataLim, ax.viewLim.frozen()
+            if first:
+                ax.set_autoscale_on(True)
+                ax.autoscale_view()
+            elif not (view.x0 <= data.x0 and data.x1 <= view.x1 and view.y0 <= data.y0 and data.y1 <= view.y1):
+                ax.autoscale_view()
+                fitted = ax.viewLim
+                # auto=None keeps autoscaling on, so later updates can grow the view again
+                ax.set_xlim(min(view.x0, fitted.x0), max(view.x1, fitted.x1), auto=None)
+                ax.set_ylim(min(view.y0, fitted.y0), max(view.y1, fitted.y1), auto=None)
+                full = True
+        full = full or first
+
+        if full:
+            canvas.draw()
+            plt.show(block=False)
+        else:
+            for background in self._backgrounds:
+                canvas.restore_region(background)
+            for artist in self.lines.values():
+                artist.axes.draw_artist(artist)
+            for ax in self.axes.flat:
+                canvas.blit(ax.bbox)
+        canvas.flush_events()
+
+    def update(self, time_steps, actual_positions, targets, errors, control_signals, measured_positions=None,
+               live=False):
+        """
+        Replace the plotted data.
+
+        Args:
+            time_steps: Array or list of time values
+            actual_positions: Array or list of actual motor positions
+            targets: Array or list of target positions
+            errors: Array or list of position errors
+            control_signals: Array or list of control signal values
+            measured_positions: Array or list of encoder measurements (optional)
+            live: Blit the new data over the cached background instead of
+                scheduling a full redraw, when the canvas supports it
+
+        Returns:
+            True if the update was blitted
+        """
+        axes = self.axes
+
+        time_steps = np.ascontiguousarray(time_steps, dtype=np.float32)
+        actual_positions = np.ascontiguousarray(actual_positions, dtype=np.float32)
+        targets = np.ascontiguousarray(targets, dtype=np.float32)
+        errors = np.ascontiguousarray(errors, dtype=np.float32)
+        control_signals = np.ascontiguousarray(control_signals, dtype=np.float32)
+        if measured_positions is not None:
+            measured_positions = np.ascontiguousarray(measured_positions, dtype=np.float32)
+
+        series = {'actual': actual_positions, 'measured': measured_positions, 'target': targets}
+        names = [name for name, values in series.items() if values is not None]
+        styles = [_POSITION_STYLES[name] for name in names]
+        segments = [np.column_stack(_downsample(axes[0, 0], time_steps, series[name])) for name in names]
+        position = self.lines['position']
+        position.set_segments(segments)
+        position.set_color([color for _, color, _, _ in styles])
+        position.set_linewidth([width for _, _, width, _ in styles])
+        position.set_linestyle([style for _, _, _, style in styles])
+        if names != self._legend_names:
+            axes[0, 0].legend(handles=[Line2D([], [], color=color, linewidth=width, linestyle=style, label=label)
+                                       for label, color, width, style in styles])
+            self._legend_names = names
+            self._backgrounds = None
+
+        self.lines['error'].set_data(*_downsample(axes[0, 1], time_steps, errors))
+        self.lines['control'].set_data(*_downsample(axes[1, 0], time_steps, control_signals))
+        self.lines['phase'].set_data(errors, control_signals)
+
+        # relim() only looks at lines and patches, so the collection sets its own limits
+        for ax in axes.flat:
+            ax.relim(visible_only=True)
+        axes[0, 0].update_datalim(np.concatenate(segments))
+
+        if live and self.fig.canvas.supports_blit:
+            self._blit()
+            return True
+
+        for artist in self.lines.values():
+            artist.set_animated(False)
+        for ax in axes.flat:
+            ax.set_autoscale_on(True)
+            ax.autoscale_view()
+
+        self.fig.canvas.draw_idle()
+        return False
+
+
+# Simulation results figure reused across plot_simulation_results calls
+_SIM_PLOT = None
+
+
+def plot_simulation_results(time_steps, actual_positions, targets, errors, control_signals, measured_positions=None,
+                            ephemeral=False, save_path=None, dpi=100, live=False):
     """
     Plot simulation results including position, error, and control signals.
 
+    The SimulationPlot is kept between calls and only its data is replaced,
+    unless its window has been closed (saving with save_path closes it) or
+    ephemeral is set.
+
     Args:
-        time_steps: List of time values
-        actual_positions: List of actual motor positions
-        targets: List of target positions
-        errors: List of position errors
-        control_signals: List of control signal values
-        measured_positions: List of encoder measurements (optional)
+        time_steps: Array or list of time values
+        actual_positions: Array or list of actual motor positions
+        targets: Array or list of target positions
+        errors: Array or list of position errors
+        control_signals: Array or list of control signal values
+        measured_positions: Array or list of encoder measurements (optional)
+        ephemeral: Draw into a new figure that is not reused by later calls
+        save_path: Write the figure to this file and close it instead of
+            showing it, so the call does not block
+        dpi: Resolution used with save_path
+        live: Blit the new data over the cached figure background and return
+            without blocking, for calls from a running loop; ignored with save_path
     """
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-
-    axes[0, 0].plot(time_steps, actual_positions, 'b-', linewidth=2, label='Actual Position')
-    if measured_positions is not None:
-        axes[0, 0].plot(time_steps, measured_positions, 'c--', linewidth=1.5, alpha=0.7, label='Encoder Reading')
-    axes[0, 0].plot(time_steps, targets, 'r--', linewidth=2, label='Target Position')
-    axes[0, 0].set_xlabel('Time (s)')
-    axes[0, 0].set_ylabel('Position (degrees)')
-    axes[0, 0].set_title('Motor Position vs Target (Closed-Loop with Encoder Feedback)')
-    axes[0, 0].legend()
-    axes[0, 0].grid(True)
-
-    axes[0, 1].plot(time_steps, errors, 'g-', linewidth=2)
-    axes[0, 1].set_xlabel('Time (s)')
-    axes[0, 1].set_ylabel('Error (degrees)')
-    axes[0, 1].set_title('Position Error Over Time')
-    axes[0, 1].grid(True)
-
-    axes[1, 0].plot(time_steps, control_signals, 'm-', linewidth=2)
-    axes[1, 0].set_xlabel('Time (s)')
-    axes[1, 0].set_ylabel('Control Signal')
-    axes[1, 0].set_title('Control Signal Over Time (Fuzzy Output)')
-    axes[1, 0].grid(True)
-
-    axes[1, 1].plot(errors, control_signals, 'c-', linewidth=1.5)
-    axes[1, 1].set_xlabel('Error (degrees)')
-    axes[1, 1].set_ylabel('Control Signal')
-    axes[1, 1].set_title('Control Signal vs Error')
-    axes[1, 1].grid(True)
-
-    plt.tight_layout()
-    plt.show()
-
-
-def plot_control_surface(controller):
+    global _SIM_PLOT
+
+    if ephemeral:
+        plot = SimulationPlot()
+    else:
+        if _SIM_PLOT is None or not _SIM_PLOT.is_open:
+            _SIM_PLOT = SimulationPlot()
+        plot = _SIM_PLOT
+
+    blitted = plot.update(time_steps, actual_positions, targets, errors, control_signals, measured_positions,
+                          live=live and save_path is None)
+    if not blitted:
+        _show_or_save(plot.fig, save_path, dpi)
+
+
+def plot_control_surface(controller, publish=False, save_path=None, dpi=100):
     """
     Plot 3D control surface showing control output for error and delta error.
 
     Args:
         controller: FuzzyMotorController instance
+        publish: Draw an antialiased vector surface for print instead of the
+            faster rasterized one
+        save_path: Write the figure to this file and close it instead of
+            showing it, so the call does not block
+        dpi: Resolution used with save_path
     """
-    error_range = np.linspace(-180, 180, 30)
-    delta_error_range = np.linspace(-50, 50, 30)
-    x, y = np.meshgrid(error_range, delta_error_range)
-    z = np.zeros_like(x, dtype=float)
-
-    sim = ctrl.ControlSystemSimulation(controller.control_system)
+    # The plotted grid is cached on the controller until its rule base is rebuilt
+    if controller._surface_cache is None:
+        error_range = np.linspace(-180, 180, 30, dtype=np.float32)
+        delta_error_range = np.linspace(-50, 50, 30, dtype=np.float32)
+        # Row and column vectors; evaluating both broadcasts to the full grid
+        x, y = np.meshgrid(error_range, delta_error_range, sparse=True)
+        z = controller.compute_control_vec(x, y)
+        controller._surface_cache = (error_range, delta_error_range, z)
 
-    for i in range(x.shape[0]):
-        for j in range(x.shape[1]):
-            sim.input['error'] = x[i, j]
-            sim.input['delta_error'] = y[i, j]
-            sim.compute()
-            z[i, j] = sim.output['control']
+    error_range, delta_error_range, z = controller._surface_cache
+    x = np.broadcast_to(error_range, z.shape)
+    y = np.broadcast_to(delta_error_range[:, np.newaxis], z.shape)
 
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
     surf = ax.plot_surface(x, y, z, rstride=1, cstride=1, cmap='viridis',
-                           linewidth=0.4, antialiased=True)
+                           linewidth=0.0, antialiased=publish, rasterized=not publish)
 
     ax.set_xlabel('Error (degrees)')
     ax.set_ylabel('Delta Error (degrees/step)')
     ax.set_zlabel('Control Signal')
     ax.set_title('Fuzzy Control Surface')
     ax.view_init(30, 200)
+    for axis in (ax.xaxis, ax.yaxis, ax.zaxis):
+        axis._axinfo['grid'].update({'linewidth': 0.2})
+    ax.zaxis.set_major_locator(MaxNLocator(5))
     fig.colorbar(surf)
-    plt.show()
+    _show_or_save(fig, save_path, dpi)
 
 
-def plot_final_summary(current_pos, target_pos, final_pos, steps):
+def plot_final_summary(current_pos, target_pos, final_pos, steps, save_path=None, dpi=100):
     """
     Plot summary bar chart showing initial, target, and final positions.
 
@@ -118,30 +353,29 @@ def plot_final_summary(current_pos, target_pos, final_pos, steps):
         target_pos: Target position in degrees
         final_pos: Final achieved position in degrees
         steps: Number of simulation steps to converge
+        save_path: Write the figure to this file and close it instead of
+            showing it, so the call does not block
+        dpi: Resolution used with save_path
     """
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = plt.subplots(figsize=(8, 6), constrained_layout=True)
 
-    positions = [current_pos, target_pos, final_pos]
+    positions = np.asarray([current_pos, target_pos, final_pos], dtype=np.float64)
     labels = ['Initial\nPosition', 'Target\nPosition', 'Final\nPosition']
     colors = ['blue', 'red', 'green']
 
     bars = ax.bar(labels, positions, color=colors, alpha=0.7, edgecolor='black', linewidth=2)
-
-    for i, (bar, pos) in enumerate(zip(bars, positions)):
-        height = bar.get_height()
-        va = 'bottom' if pos >= 0 else 'top'
-        y_pos = height if pos >= 0 else height
-        ax.text(bar.get_x() + bar.get_width()/2., y_pos,
-                f'{pos:.1f}°', ha='center', va=va, fontsize=12, fontweight='bold')
+    # Labels sit past the end of each bar, above positive and below negative ones
+    ax.bar_label(bars, fmt='%.1f°', padding=3, fontsize=12, fontweight='bold')
 
     ax.set_ylabel('Position (degrees)', fontsize=12)
     ax.set_title(f'Motor Position Control Summary\n(Converged in {steps} steps)', fontsize=14)
     ax.grid(True, axis='y', alpha=0.3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.tick_params(axis='x', length=0)
 
-    min_pos = min(positions)
-    max_pos = max(positions)
-    margin = (max_pos - min_pos) * 0.2 if max_pos != min_pos else 10
-    ax.set_ylim([min_pos - margin, max_pos + margin])
+    lo, hi = positions.min(), positions.max()
+    margin = (hi - lo) * 0.2 or 10.0
+    ax.set_ylim([lo - margin, hi + margin])
 
-    plt.tight_layout()
-    plt.show()
+    _show_or_save(fig, save_path, dpi)